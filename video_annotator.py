@@ -4,8 +4,177 @@ import cv2
 from PIL import Image, ImageTk
 import pandas as pd
 import threading
+import multiprocessing
+import queue
 import time
 import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".wmv", ".flv")
+
+# Number of leading frames decoded ahead of time when pre-opening a video
+PRELOAD_FRAMES = 10
+
+
+def merge_frame_windows(frame_numbers, frames_before, frames_after, total_frames):
+    """Build sorted, merged [start, end] frame windows around annotated frames"""
+    windows = []
+    for frame_number in sorted(set(frame_numbers)):
+        start = max(0, frame_number - frames_before)
+        end = min(total_frames - 1, frame_number + frames_after)
+
+        # Extend the previous window if the two overlap or touch
+        if windows and start <= windows[-1][1] + 1:
+            windows[-1][1] = max(windows[-1][1], end)
+            windows[-1][2].append(frame_number)
+        else:
+            windows.append([start, end, [frame_number]])
+
+    return [(start, end, frames) for start, end, frames in windows]
+
+
+def split_frame_windows(windows, num_workers):
+    """Distribute windows over workers so each decodes a similar number of frames"""
+    num_workers = max(1, min(num_workers, len(windows)))
+    chunks = [[] for _ in range(num_workers)]
+    loads = [0] * num_workers
+
+    # Largest windows first, each one to the least loaded worker
+    for window in sorted(windows, key=lambda w: w[1] - w[0], reverse=True):
+        target = loads.index(min(loads))
+        chunks[target].append(window)
+        loads[target] += window[1] - window[0] + 1
+
+    # Keep every worker's ranges in file order so it can decode sequentially
+    return [sorted(chunk) for chunk in chunks if chunk]
+
+
+# Progress queue and cancel event of the export running in this worker process
+_export_progress_queue = None
+_export_cancel_event = None
+
+
+def init_export_worker(progress_queue, cancel_event):
+    """Process pool initializer: keep the export's queue and event for the worker"""
+    global _export_progress_queue, _export_cancel_event
+    _export_progress_queue = progress_queue
+    _export_cancel_event = cancel_event
+
+
+def export_windows_worker(video_path, windows, output_dir, mode):
+    """Decode the given windows with a single capture and write frames or clips.
+
+    Runs in a worker process. Returns the manifest rows for the files written.
+    """
+    progress_queue = _export_progress_queue
+    cancel_event = _export_cancel_event
+    video_name = os.path.basename(video_path)
+    cap = cv2.VideoCapture(video_path)
+    # Use the container's frame rate, not the (integer, user-editable) playback FPS
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    writer = None
+    rows = []
+
+    def manifest_row(file_name, start, end, annotation_frames):
+        return {
+            'Video': video_name,
+            'File': file_name,
+            'Start Frame': start,
+            'End Frame': end,
+            'Start Time (s)': round(start / fps, 3),
+            'End Time (s)': round(end / fps, 3),
+            'Annotation Frames': " ".join(str(f) for f in annotation_frames)
+        }
+
+    try:
+        for start, end, annotation_frames in windows:
+            if cancel_event.is_set():
+                break
+
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+            clip_name = f"clip_{start:06d}_{end:06d}.mp4"
+            last_frame = start - 1
+            pending = 0
+
+            for frame_number in range(start, end + 1):
+                if cancel_event.is_set():
+                    break
+
+                ret, frame = cap.read()
+                if not ret:
+                    break
+
+                if mode == "Clips":
+                    if writer is None:
+                        h, w = frame.shape[:2]
+                        writer = cv2.VideoWriter(os.path.join(output_dir, clip_name),
+                                                 cv2.VideoWriter_fourcc(*"mp4v"), fps, (w, h))
+                        if not writer.isOpened():
+                            raise IOError(f"Cannot open video writer for {clip_name}")
+                    writer.write(frame)
+                else:
+                    frame_name = f"frame_{frame_number:06d}.jpg"
+                    if not cv2.imwrite(os.path.join(output_dir, frame_name), frame):
+                        raise IOError(f"Cannot write {frame_name}")
+                    rows.append(manifest_row(frame_name, frame_number, frame_number, annotation_frames))
+
+                last_frame = frame_number
+                pending += 1
+                if pending >= 25:
+                    progress_queue.put(pending)
+                    pending = 0
+
+            if pending:
+                progress_queue.put(pending)
+
+            if writer is not None:
+                writer.release()
+                writer = None
+                rows.append(manifest_row(clip_name, start, last_frame, annotation_frames))
+    finally:
+        if writer is not None:
+            writer.release()
+        cap.release()
+
+    return rows
+
+
+def open_video_capture(video_path, warm_frames=0):
+    """Open a video, read its properties and decode its first frames.
+
+    Safe to run in a background thread; the result is handed to load_video.
+    """
+    cap = cv2.VideoCapture(video_path)
+    ret, first_frame = cap.read() if cap.isOpened() else (False, None)
+
+    if not ret:
+        cap.release()
+        raise IOError(f"Cannot read video: {os.path.basename(video_path)}")
+
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = int(cap.get(cv2.CAP_PROP_FPS)) or 30
+
+    frames = {0: first_frame} if warm_frames > 0 else {}
+
+    # Some containers (e.g. mkv/webm streams) report no frame count: count the frames instead
+    if total_frames <= 0:
+        total_frames = 1
+        while cap.grab():
+            total_frames += 1
+        cap.set(cv2.CAP_PROP_POS_FRAMES, len(frames))
+
+    for frame_number in range(len(frames), min(warm_frames, total_frames)):
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames[frame_number] = frame
+
+    return {
+        'cap': cap,
+        'total_frames': total_frames,
+        'fps': fps,
+        'frames': frames
+    }
 
 
 class VideoAnnotationTool:
@@ -23,6 +192,7 @@ class VideoAnnotationTool:
         self.current_time = 0.0
         self.is_playing = False
         self.frame_duration = 1000 // 30  # milliseconds
+        self.frame_cache = {}  # frames decoded ahead of time, by frame number
 
         # Annotation variables
         self.annotations = []
@@ -35,7 +205,19 @@ class VideoAnnotationTool:
             "Other": "#DDA0DD"
         }
 
+        # Project variables
+        self.project_dir = None
+        self.playlist = []
+        self.playlist_index = -1
+        self.project_annotations = {}  # annotations per video path, once restored
+        self.project_rejected = {}  # unloadable rows of each video's annotation file
+        self.preload = None  # background pre-opening of the next video
+
+        # Cancel event of the running clip/frame export, if any
+        self.export_cancel_event = None
+
         self.setup_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
     def setup_ui(self):
         # Main container
@@ -47,8 +229,10 @@ class VideoAnnotationTool:
         top_frame.pack(fill=tk.X, pady=(0, 10))
 
         ttk.Button(top_frame, text="Open Video", command=self.open_video).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(top_frame, text="Open Project", command=self.open_project).pack(side=tk.LEFT, padx=(0, 10))
         ttk.Button(top_frame, text="Load Annotations", command=self.load_annotations).pack(side=tk.LEFT, padx=(0, 10))
-        ttk.Button(top_frame, text="Export CSV", command=self.export_csv).pack(side=tk.LEFT)
+        ttk.Button(top_frame, text="Export CSV", command=self.export_csv).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(top_frame, text="Export Clips/Frames", command=self.export_windows).pack(side=tk.LEFT)
 
         # Main content frame
         content_frame = ttk.Frame(main_frame)
@@ -123,6 +307,30 @@ class VideoAnnotationTool:
         right_frame.pack(side=tk.RIGHT, fill=tk.BOTH, padx=(10, 0))
         right_frame.pack_propagate(False)
 
+        # Project playlist section
+        project_frame = ttk.LabelFrame(right_frame, text="Project")
+        project_frame.pack(fill=tk.X, pady=(0, 10))
+
+        self.project_label = ttk.Label(project_frame, text="No project loaded")
+        self.project_label.pack(anchor=tk.W, padx=5, pady=(5, 0))
+
+        playlist_frame = ttk.Frame(project_frame)
+        playlist_frame.pack(fill=tk.X, padx=5, pady=5)
+
+        self.playlist_listbox = tk.Listbox(playlist_frame, height=5, exportselection=False)
+        playlist_scrollbar = ttk.Scrollbar(playlist_frame, orient=tk.VERTICAL, command=self.playlist_listbox.yview)
+        self.playlist_listbox.configure(yscrollcommand=playlist_scrollbar.set)
+
+        self.playlist_listbox.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        playlist_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.playlist_listbox.bind("<Double-1>", lambda e: self.open_selected_video())
+
+        nav_frame = ttk.Frame(project_frame)
+        nav_frame.pack(fill=tk.X, padx=5, pady=(0, 5))
+
+        ttk.Button(nav_frame, text="Prev Video", command=self.prev_video).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(nav_frame, text="Next Video", command=self.next_video).pack(side=tk.LEFT)
+
         # Add annotation section
         add_frame = ttk.LabelFrame(right_frame, text="Add Annotation")
         add_frame.pack(fill=tk.X, pady=(0, 10))
@@ -278,19 +486,34 @@ class VideoAnnotationTool:
         )
 
         if file_path:
-            self.load_video(file_path)
-
-    def load_video(self, video_path):
+            # Playlist videos go through the project so their annotations are restored
+            index = self.playlist_position(file_path)
+            if index is not None:
+                self.switch_video(index)
+                return
+
+            # Keep the annotations of the project video being replaced
+            self.save_project_annotations()
+            if self.load_video(file_path) and self.playlist:
+                self.playlist_listbox.selection_clear(0, tk.END)
+                self.project_label.config(text=f"Outside project: {os.path.basename(file_path)}")
+
+    def load_video(self, video_path, preloaded=None, show_message=True):
+        """Load a video, optionally from a capture already opened by open_video_capture"""
         try:
+            if preloaded is None:
+                preloaded = open_video_capture(video_path)
+
             self.video_path = video_path
             if self.cap:
                 self.cap.release()
 
-            self.cap = cv2.VideoCapture(video_path)
+            self.cap = preloaded['cap']
+            self.frame_cache = preloaded['frames']
 
             # Get video properties
-            self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            self.fps = int(self.cap.get(cv2.CAP_PROP_FPS)) or 30
+            self.total_frames = preloaded['total_frames']
+            self.fps = preloaded['fps']
             self.fps_var.set(str(self.fps))
             self.frame_duration = 1000 // self.fps
 
@@ -313,15 +536,46 @@ class VideoAnnotationTool:
             self.update_info()
             self.draw_timeline()
 
-            messagebox.showinfo("Success", f"Video loaded successfully!\nFrames: {self.total_frames}\nFPS: {self.fps}")
+            if show_message:
+                messagebox.showinfo("Success", f"Video loaded successfully!\nFrames: {self.total_frames}\nFPS: {self.fps}")
+
+            return True
 
         except Exception as e:
+            self.unload_video()
             messagebox.showerror("Error", f"Failed to load video: {str(e)}")
+            return False
+
+    def unload_video(self):
+        """Reset the player to its empty state"""
+        if self.cap:
+            self.cap.release()
+
+        self.cap = None
+        self.video_path = None
+        self.frame_cache = {}
+        self.total_frames = 0
+        self.current_frame = 0
+        self.current_time = 0.0
+        self.is_playing = False
+        self.play_button.config(text="Play")
+
+        self.annotations = []
+        self.update_annotations_list()
+        self.timeline_canvas.delete("all")
+        self.video_label.config(image="", text="No Video Loaded", width=80, height=30)
+        self.video_label.image = None
+        self.update_info()
 
     def show_frame(self):
         if self.cap and self.cap.isOpened():
-            self.cap.set(cv2.CAP_PROP_POS_FRAMES, self.current_frame)
-            ret, frame = self.cap.read()
+            # Warmed frames are full resolution: use each once, drop the rest on the first seek
+            if self.current_frame in self.frame_cache:
+                ret, frame = True, self.frame_cache.pop(self.current_frame)
+            else:
+                self.frame_cache.clear()
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, self.current_frame)
+                ret, frame = self.cap.read()
 
             if ret:
                 # Convert BGR to RGB
@@ -563,23 +817,198 @@ class VideoAnnotationTool:
 
         if file_path:
             try:
-                df_data = []
-                for ann in sorted(self.annotations, key=lambda x: x['frame_number']):
-                    df_data.append({
-                        'Frame Number': ann['frame_number'],
-                        'Time Instant (s)': round(ann['time_instant'], 3),
-                        'Annotation': ann['annotation'],
-                        'Comment': ann['comment'],
-                        'Category': ann['category']
-                    })
-
-                df = pd.DataFrame(df_data)
+                df = self.annotations_to_dataframe()
                 df.to_csv(file_path, index=False)
                 messagebox.showinfo("Success", f"Annotations exported to {file_path}")
 
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to export CSV: {str(e)}")
 
+    def export_windows(self):
+        """Export the frames or short clips around every annotation"""
+        if not self.cap:
+            messagebox.showwarning("Warning", "Please load a video first!")
+            return
+
+        if not self.annotations:
+            messagebox.showwarning("Warning", "No annotations to export!")
+            return
+
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Export Clips/Frames")
+        dialog.geometry("320x260")
+        dialog.transient(self.root)
+        dialog.grab_set()
+
+        # Center dialog on parent
+        dialog.geometry("+%d+%d" % (self.root.winfo_rootx() + 50, self.root.winfo_rooty() + 50))
+
+        # Output mode
+        ttk.Label(dialog, text="Export:").pack(anchor=tk.W, padx=10, pady=(10, 0))
+        mode_var = tk.StringVar(value="Frames")
+        ttk.Combobox(dialog, textvariable=mode_var, values=["Frames", "Clips"],
+                     state="readonly").pack(fill=tk.X, padx=10, pady=(0, 10))
+
+        # Window around each annotation
+        window_frame = ttk.Frame(dialog)
+        window_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+
+        ttk.Label(window_frame, text="Frames before:").grid(row=0, column=0, sticky=tk.W)
+        before_var = tk.StringVar(value=str(self.fps))
+        ttk.Entry(window_frame, textvariable=before_var, width=8).grid(row=0, column=1, padx=(5, 0), pady=2)
+
+        ttk.Label(window_frame, text="Frames after:").grid(row=1, column=0, sticky=tk.W)
+        after_var = tk.StringVar(value=str(self.fps))
+        ttk.Entry(window_frame, textvariable=after_var, width=8).grid(row=1, column=1, padx=(5, 0), pady=2)
+
+        ttk.Label(window_frame, text="Workers:").grid(row=2, column=0, sticky=tk.W)
+        workers_var = tk.StringVar(value=str(os.cpu_count() or 1))
+        ttk.Entry(window_frame, textvariable=workers_var, width=8).grid(row=2, column=1, padx=(5, 0), pady=2)
+
+        # Buttons
+        button_frame = ttk.Frame(dialog)
+        button_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+
+        def start_export():
+            try:
+                frames_before = int(before_var.get())
+                frames_after = int(after_var.get())
+                num_workers = int(workers_var.get())
+            except ValueError:
+                messagebox.showerror("Error", "Frame counts and workers must be integers!", parent=dialog)
+                return
+
+            if frames_before < 0 or frames_after < 0 or num_workers < 1:
+                messagebox.showerror("Error", "Frame counts must be >= 0 and workers >= 1!", parent=dialog)
+                return
+
+            output_dir = filedialog.askdirectory(title="Select Output Folder", parent=dialog)
+            if not output_dir:
+                return
+
+            # One subfolder per video so several videos can share a dataset folder
+            output_dir = os.path.join(output_dir, os.path.splitext(os.path.basename(self.video_path))[0])
+            if os.path.exists(os.path.join(output_dir, "manifest.csv")):
+                if not messagebox.askyesno("Confirm", f"{output_dir} already contains an export. Overwrite it?",
+                                           parent=dialog):
+                    return
+
+            mode = mode_var.get()
+            dialog.destroy()
+            self.run_windows_export(output_dir, mode, frames_before, frames_after, num_workers)
+
+        ttk.Button(button_frame, text="Export", command=start_export).pack(side=tk.RIGHT, padx=(5, 0))
+        ttk.Button(button_frame, text="Cancel", command=dialog.destroy).pack(side=tk.RIGHT)
+
+    def run_windows_export(self, output_dir, mode, frames_before, frames_after, num_workers):
+        """Run the clip/frame export on a process pool and show its progress"""
+        windows = merge_frame_windows([ann['frame_number'] for ann in self.annotations],
+                                      frames_before, frames_after, self.total_frames)
+        chunks = split_frame_windows(windows, num_workers)
+        total = sum(end - start + 1 for start, end, _ in windows)
+
+        try:
+            os.makedirs(output_dir, exist_ok=True)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to create output folder: {str(e)}")
+            return
+
+        # Stop playback so the export does not compete with the display
+        self.is_playing = False
+        self.play_button.config(text="Play")
+
+        # Progress dialog
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Exporting")
+        dialog.geometry("360x130")
+        dialog.transient(self.root)
+        dialog.grab_set()
+        dialog.geometry("+%d+%d" % (self.root.winfo_rootx() + 50, self.root.winfo_rooty() + 50))
+
+        status_label = ttk.Label(dialog, text=f"Exporting {len(windows)} windows with {len(chunks)} workers...")
+        status_label.pack(anchor=tk.W, padx=10, pady=(10, 5))
+
+        progress = ttk.Progressbar(dialog, maximum=total, mode="determinate")
+        progress.pack(fill=tk.X, padx=10, pady=(0, 10))
+
+        # Never fork this multi-threaded Tk process; workers start from a fresh interpreter.
+        # The queue and event reach them through the pool initializer, so no manager process is needed.
+        mp_context = multiprocessing.get_context("spawn")
+        progress_queue = mp_context.Queue()
+        cancel_event = mp_context.Event()
+        self.export_cancel_event = cancel_event
+        state = {'done': 0, 'rows': [], 'error': None, 'finished': False}
+
+        def cancel_export():
+            cancel_event.set()
+            status_label.config(text="Cancelling...")
+            cancel_button.config(state=tk.DISABLED)
+
+        cancel_button = ttk.Button(dialog, text="Cancel", command=cancel_export)
+        cancel_button.pack(side=tk.RIGHT, padx=10, pady=(0, 10))
+        dialog.protocol("WM_DELETE_WINDOW", cancel_export)
+
+        def run_pool():
+            try:
+                with ProcessPoolExecutor(max_workers=len(chunks), mp_context=mp_context,
+                                         initializer=init_export_worker,
+                                         initargs=(progress_queue, cancel_event)) as executor:
+                    futures = [executor.submit(export_windows_worker, self.video_path, chunk, output_dir, mode)
+                               for chunk in chunks]
+                    for future in as_completed(futures):
+                        try:
+                            state['rows'].extend(future.result())
+                        except Exception as e:
+                            # Stop the other workers as soon as one fails
+                            if state['error'] is None:
+                                state['error'] = e
+                            cancel_event.set()
+            except Exception as e:
+                state['error'] = e
+            state['finished'] = True
+
+        def drain_progress():
+            try:
+                while True:
+                    state['done'] += progress_queue.get_nowait()
+            except queue.Empty:
+                pass
+
+            progress.config(value=state['done'])
+
+        def poll_progress():
+            if not state['finished']:
+                drain_progress()
+                self.root.after(100, poll_progress)
+                return
+
+            # Pick up counts queued after the previous read
+            drain_progress()
+            cancelled = cancel_event.is_set()
+            self.export_cancel_event = None
+            dialog.destroy()
+
+            if state['error'] is not None:
+                messagebox.showerror("Error", f"Failed to export: {str(state['error'])}")
+                return
+
+            if cancelled:
+                messagebox.showinfo("Cancelled", f"Export cancelled after {state['done']} of {total} frames.")
+                return
+
+            try:
+                rows = sorted(state['rows'], key=lambda x: x['Start Frame'])
+                manifest_path = os.path.join(output_dir, "manifest.csv")
+                pd.DataFrame(rows, columns=['Video', 'File', 'Start Frame', 'End Frame', 'Start Time (s)',
+                                            'End Time (s)', 'Annotation Frames']).to_csv(manifest_path, index=False)
+                messagebox.showinfo("Success", f"Exported {len(rows)} files to {output_dir}")
+
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to write manifest: {str(e)}")
+
+        threading.Thread(target=run_pool, daemon=True).start()
+        self.root.after(100, poll_progress)
+
     def load_annotations(self):
         """Load annotations from a CSV file"""
         if not self.cap:
@@ -608,45 +1037,13 @@ class VideoAnnotationTool:
                     if not messagebox.askyesno("Confirm", "This will replace existing annotations. Continue?"):
                         return
 
-                self.annotations = []
-
                 # Load annotations from CSV
-                loaded_count = 0
-                skipped_count = 0
-
-                for index, row in df.iterrows():
-                    try:
-                        frame_number = int(row["Frame Number"])
-                        time_instant = float(row["Time Instant (s)"])
-                        annotation_text = str(row["Annotation"]) if pd.notna(row["Annotation"]) else ""
-                        comment_text = str(row["Comment"]) if pd.notna(row["Comment"]) else ""
-                        category = str(row["Category"]) if pd.notna(row["Category"]) else "Other"
-
-                        # Validate frame number is within video range
-                        if frame_number < 0 or frame_number >= self.total_frames:
-                            skipped_count += 1
-                            continue
-
-                        # Ensure category exists, default to "Other" if not
-                        if category not in self.annotation_categories:
-                            category = "Other"
-
-                        annotation = {
-                            "id": len(self.annotations),
-                            "frame_number": frame_number,
-                            "time_instant": time_instant,
-                            "annotation": annotation_text,
-                            "comment": comment_text,
-                            "category": category,
-                            "color": self.annotation_categories[category]
-                        }
-
-                        self.annotations.append(annotation)
-                        loaded_count += 1
-
-                    except (ValueError, KeyError) as e:
-                        skipped_count += 1
-                        continue
+                self.annotations, skipped_rows = self.annotations_from_dataframe(df)
+                loaded_count = len(self.annotations)
+                skipped_count = len(skipped_rows)
+
+                # The project file's unloadable rows belong to the annotations just replaced
+                self.project_rejected.pop(self.video_path, None)
 
                 # Update UI
                 self.update_annotations_list()
@@ -662,6 +1059,297 @@ class VideoAnnotationTool:
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to load annotations: {str(e)}")
 
+    def annotations_to_dataframe(self):
+        """Convert annotations to the CSV export layout"""
+        df_data = []
+        for ann in sorted(self.annotations, key=lambda x: x['frame_number']):
+            df_data.append({
+                'Frame Number': ann['frame_number'],
+                'Time Instant (s)': round(ann['time_instant'], 3),
+                'Annotation': ann['annotation'],
+                'Comment': ann['comment'],
+                'Category': ann['category']
+            })
+
+        return pd.DataFrame(df_data, columns=["Frame Number", "Time Instant (s)", "Annotation", "Comment", "Category"])
+
+    def annotations_from_dataframe(self, df):
+        """Build annotations from a DataFrame in the CSV export layout.
+
+        Returns the annotations and the rows that could not be loaded.
+        """
+        annotations = []
+        skipped_index = []
+
+        for index, row in df.iterrows():
+            try:
+                frame_number = int(row["Frame Number"])
+                time_instant = float(row["Time Instant (s)"])
+                annotation_text = str(row["Annotation"]) if pd.notna(row["Annotation"]) else ""
+                comment_text = str(row["Comment"]) if pd.notna(row["Comment"]) else ""
+                category = str(row["Category"]) if pd.notna(row["Category"]) else "Other"
+
+                # Validate frame number is within video range
+                if frame_number < 0 or frame_number >= self.total_frames:
+                    skipped_index.append(index)
+                    continue
+
+                # Ensure category exists, default to "Other" if not
+                if category not in self.annotation_categories:
+                    category = "Other"
+
+                annotation = {
+                    "id": len(annotations),
+                    "frame_number": frame_number,
+                    "time_instant": time_instant,
+                    "annotation": annotation_text,
+                    "comment": comment_text,
+                    "category": category,
+                    "color": self.annotation_categories[category]
+                }
+
+                annotations.append(annotation)
+
+            except (ValueError, KeyError) as e:
+                skipped_index.append(index)
+                continue
+
+        return annotations, df.loc[skipped_index]
+
+    def open_project(self):
+        """Open a folder of videos as a project playlist"""
+        folder = filedialog.askdirectory(title="Select Video Folder")
+        if not folder:
+            return
+
+        videos = sorted(f for f in os.listdir(folder)
+                        if os.path.splitext(f)[1].lower() in VIDEO_EXTENSIONS)
+        if not videos:
+            messagebox.showwarning("Warning", "No video files found in the selected folder!")
+            return
+
+        # Persist the previous project before replacing it
+        self.save_project_annotations()
+        self.release_preloaded()
+
+        self.project_dir = folder
+        self.playlist = [os.path.join(folder, f) for f in videos]
+        self.playlist_index = -1
+        self.project_annotations = {}
+        self.project_rejected = {}
+
+        self.playlist_listbox.delete(0, tk.END)
+        for name in videos:
+            self.playlist_listbox.insert(tk.END, name)
+
+        self.switch_video(0)
+
+    def playlist_position(self, video_path):
+        """Index of video_path in the project playlist, or None"""
+        target = os.path.normcase(os.path.abspath(video_path))
+        for index, path in enumerate(self.playlist):
+            if os.path.normcase(os.path.abspath(path)) == target:
+                return index
+        return None
+
+    def annotation_file_for(self, video_path):
+        """Path of the CSV that stores a project video's annotations"""
+        # Keep the extension so clips differing only by container do not collide
+        return os.path.join(self.project_dir, "annotations", os.path.basename(video_path) + ".csv")
+
+    def save_project_annotations(self):
+        """Persist the current video's annotations in the project's annotations folder"""
+        if not self.project_dir or not self.video_path:
+            return
+
+        # Only videos whose annotations were restored may overwrite their file
+        if self.video_path not in self.project_annotations:
+            self.save_recovered_annotations()
+            return
+
+        self.project_annotations[self.video_path] = self.annotations
+
+        file_path = self.annotation_file_for(self.video_path)
+        if not self.annotations and not os.path.exists(file_path):
+            return
+
+        try:
+            df = self.annotations_to_dataframe()
+
+            # Write back rows that could not be loaded instead of dropping them
+            rejected = self.project_rejected.get(self.video_path)
+            if rejected is not None and len(rejected):
+                df = pd.concat([df, rejected], ignore_index=True)
+
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            df.to_csv(file_path, index=False)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save annotations: {str(e)}")
+
+    def save_recovered_annotations(self):
+        """Offer to save annotations that cannot go to the video's project file"""
+        if not self.annotations:
+            return
+
+        file_path = os.path.splitext(self.annotation_file_for(self.video_path))[0] + ".recovered.csv"
+        if not messagebox.askyesno(
+                "Unsaved Annotations",
+                f"The annotations of {os.path.basename(self.video_path)} are not part of the project "
+                f"and will be lost.\nSave them to {os.path.basename(file_path)}?"):
+            return
+
+        try:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            self.annotations_to_dataframe().to_csv(file_path, index=False)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save annotations: {str(e)}")
+
+    def switch_video(self, index):
+        """Save the current video's annotations and load another playlist video"""
+        if not 0 <= index < len(self.playlist):
+            return
+
+        self.save_project_annotations()
+
+        video_path = self.playlist[index]
+        preloaded = self.take_preloaded(video_path)
+
+        loaded = self.load_video(video_path, preloaded=preloaded, show_message=False)
+
+        # Move on even when loading failed, so Next Video can skip a broken file
+        self.playlist_index = index
+        self.playlist_listbox.selection_clear(0, tk.END)
+        self.playlist_listbox.selection_set(index)
+        self.playlist_listbox.see(index)
+
+        if not loaded:
+            self.playlist_listbox.itemconfig(index, fg="red")
+            self.project_label.config(
+                text=f"Video {index + 1} / {len(self.playlist)}: {os.path.basename(video_path)} (failed to load)")
+            self.preload_video(index + 1)
+            return
+
+        self.project_label.config(
+            text=f"Video {index + 1} / {len(self.playlist)}: {os.path.basename(video_path)}")
+
+        # Restore annotations from this session, or from the project's annotation file
+        if video_path in self.project_annotations:
+            self.annotations = self.project_annotations[video_path]
+        else:
+            try:
+                df = preloaded.get('annotations_df') if preloaded else None
+                file_path = self.annotation_file_for(video_path)
+                if df is None and os.path.exists(file_path):
+                    df = pd.read_csv(file_path)
+
+                if df is not None:
+                    self.annotations, rejected = self.annotations_from_dataframe(df)
+                    if len(rejected):
+                        self.project_rejected[video_path] = rejected
+                        messagebox.showwarning(
+                            "Warning",
+                            f"Could not load {len(rejected)} annotations of {os.path.basename(video_path)}.\n"
+                            f"They are kept in {os.path.basename(file_path)}.")
+
+                self.project_annotations[video_path] = self.annotations
+
+            except Exception as e:
+                # Leave the file untouched: this video is not registered, so it is never saved
+                messagebox.showerror("Error", f"Failed to load annotations: {str(e)}")
+
+        self.update_annotations_list()
+        self.draw_timeline()
+
+        # Warm up the next video while this one is being annotated
+        self.preload_video(index + 1)
+
+    def preload_video(self, index):
+        """Open the given playlist video and decode its first frames in the background"""
+        self.release_preloaded()
+
+        if not 0 <= index < len(self.playlist):
+            return
+
+        video_path = self.playlist[index]
+        annotation_file = self.annotation_file_for(video_path)
+        preload = {'path': video_path, 'result': None}
+
+        def run():
+            try:
+                result = open_video_capture(video_path, warm_frames=PRELOAD_FRAMES)
+            except Exception:
+                # Fall back to opening the video when switching to it
+                return
+
+            try:
+                if os.path.exists(annotation_file):
+                    result['annotations_df'] = pd.read_csv(annotation_file)
+            except Exception:
+                pass
+
+            preload['result'] = result
+
+        preload['thread'] = threading.Thread(target=run, daemon=True)
+        preload['thread'].start()
+        self.preload = preload
+
+    def take_preloaded(self, video_path):
+        """Return the pre-opened video if it matches video_path, releasing it otherwise"""
+        preload, self.preload = self.preload, None
+        if preload is None:
+            return None
+
+        preload['thread'].join()
+        result = preload['result']
+
+        if result is not None and preload['path'] != video_path:
+            result['cap'].release()
+            return None
+
+        return result
+
+    def release_preloaded(self):
+        """Discard the pre-opened video, if any"""
+        self.take_preloaded(None)
+
+    def next_video(self):
+        if not self.playlist:
+            messagebox.showwarning("Warning", "Please open a project first!")
+            return
+
+        if self.playlist_index >= len(self.playlist) - 1:
+            messagebox.showinfo("Project", "This is the last video of the project.")
+            return
+
+        self.switch_video(self.playlist_index + 1)
+
+    def prev_video(self):
+        if not self.playlist:
+            messagebox.showwarning("Warning", "Please open a project first!")
+            return
+
+        if self.playlist_index <= 0:
+            return
+
+        self.switch_video(self.playlist_index - 1)
+
+    def open_selected_video(self):
+        selection = self.playlist_listbox.curselection()
+        if selection:
+            self.switch_video(selection[0])
+
+    def on_close(self):
+        """Persist project annotations and release captures before quitting"""
+        # Stop a running export, otherwise the exit waits for all its workers
+        if self.export_cancel_event is not None:
+            self.export_cancel_event.set()
+
+        self.save_project_annotations()
+        self.release_preloaded()
+        if self.cap:
+            self.cap.release()
+        self.root.destroy()
+
     def validate_annotation_file(self, file_path):
         """Validate that the CSV file has the correct structure"""
         try: